@@ -0,0 +1,162 @@
+# indicators.py
+
+import functools
+import numpy as np
+from numba import njit
+
+# Noyau numba des indicateurs techniques
+# Reproduit les définitions de la bibliothèque `ta` (fillna=False) :
+# les premières valeurs, avant que la fenêtre soit pleine, valent NaN
+
+# Lignes du tableau de sortie de compute_features
+FEATURE_COLUMNS = ('sma_20', 'ema_50', 'rsi', 'bb_high', 'bb_low', 'bb_width', 'obv', 'returns')
+SMA, EMA, RSI, BB_HIGH, BB_LOW, BB_WIDTH, OBV, RETURNS = range(len(FEATURE_COLUMNS))
+
+# Les features sont calculées en float32 (moitié moins d'octets lus et écrits) ;
+# les accumulateurs internes restent en float64 pour limiter la dérive des sommes glissantes
+FEATURE_DTYPE = np.float32
+
+@functools.lru_cache(maxsize=None)
+def make_kernel(sma_w=20, ema_w=50, rsi_w=14, bb_w=20, bb_dev=2.0):
+    """
+    Génère un noyau spécialisé pour un jeu de fenêtres donné
+    
+    Les fenêtres sont des constantes de compilation du noyau (variables de
+    fermeture), ce qui permet à LLVM de propager les constantes et de
+    simplifier les conditions de fenêtre. Un noyau est compilé par jeu de
+    fenêtres puis conservé en mémoire et sur disque.
+    
+    Args:
+        sma_w: Fenêtre de la moyenne mobile simple
+        ema_w: Fenêtre de la moyenne mobile exponentielle
+        rsi_w: Fenêtre du RSI
+        bb_w: Fenêtre des bandes de Bollinger
+        bb_dev: Nombre d'écarts-types des bandes de Bollinger
+    
+    Returns:
+        Noyau kernel(close, volume, out)
+    """
+    @njit(
+        'void(float32[::1], float32[::1], float32[:, ::1])',
+        cache=True, fastmath=True, nogil=True
+    )
+    def kernel(close, volume, out):
+        """
+        Calcul de tous les indicateurs en un seul passage sur les prix
+        
+        Chaque bougie n'est lue qu'une fois ; l'état de chaque indicateur
+        (somme glissante, EMA, moyennes de Wilder, variance de Welford, OBV)
+        est conservé dans des variables locales.
+        
+        Args:
+            close: Prix de clôture
+            volume: Volumes échangés
+            out: Tableau de sortie (len(FEATURE_COLUMNS), n)
+        """
+        n = close.shape[0]
+        nan = np.nan
+        
+        ema_alpha = 2.0 / (ema_w + 1)
+        rsi_alpha = 1.0 / rsi_w
+        
+        sma_sum = 0.0
+        ema = 0.0
+        avg_gain = 0.0
+        avg_loss = 0.0
+        bb_mean = 0.0
+        bb_m2 = 0.0
+        obv = 0.0
+        prev = 0.0
+        
+        for i in range(n):
+            x = close[i]
+            
+            # Moyenne mobile simple (somme glissante)
+            sma_sum += x
+            if i >= sma_w:
+                sma_sum -= close[i - sma_w]
+            out[SMA, i] = sma_sum / sma_w if i >= sma_w - 1 else nan
+            
+            # Moyenne mobile exponentielle (adjust=False)
+            ema = x if i == 0 else ema_alpha * x + (1.0 - ema_alpha) * ema
+            out[EMA, i] = ema if i >= ema_w - 1 else nan
+            
+            # RSI (moyennes de Wilder des hausses et baisses), rendements et OBV
+            gain = 0.0
+            loss = 0.0
+            if i == 0:
+                out[RETURNS, i] = nan
+                obv += volume[i]
+            else:
+                diff = x - prev
+                if diff > 0:
+                    gain = diff
+                elif diff < 0:
+                    loss = -diff
+                out[RETURNS, i] = x / prev - 1.0
+                if x < prev:
+                    obv -= volume[i]
+                else:
+                    obv += volume[i]
+            out[OBV, i] = obv
+            
+            if i == 0:
+                avg_gain = gain
+                avg_loss = loss
+            else:
+                avg_gain = rsi_alpha * gain + (1.0 - rsi_alpha) * avg_gain
+                avg_loss = rsi_alpha * loss + (1.0 - rsi_alpha) * avg_loss
+            
+            if i < rsi_w - 1:
+                out[RSI, i] = nan
+            elif avg_loss == 0:
+                out[RSI, i] = 100.0
+            else:
+                out[RSI, i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+            
+            # Bandes de Bollinger (variance glissante de Welford, écart-type de population)
+            if i < bb_w:
+                delta = x - bb_mean
+                bb_mean += delta / (i + 1)
+                bb_m2 += delta * (x - bb_mean)
+            else:
+                old = close[i - bb_w]
+                new_mean = bb_mean + (x - old) / bb_w
+                bb_m2 += (x - old) * (x - new_mean + old - bb_mean)
+                bb_mean = new_mean
+            
+            if i >= bb_w - 1:
+                band = bb_dev * np.sqrt(max(bb_m2 / bb_w, 0.0))
+                out[BB_HIGH, i] = bb_mean + band
+                out[BB_LOW, i] = bb_mean - band
+                out[BB_WIDTH, i] = 2.0 * band / x * 100
+            else:
+                out[BB_HIGH, i] = nan
+                out[BB_LOW, i] = nan
+                out[BB_WIDTH, i] = nan
+            
+            prev = x
+    
+    return kernel
+
+def compute_features(close, volume, sma_w=20, ema_w=50, rsi_w=14, bb_w=20, bb_dev=2.0):
+    """
+    Calcul des indicateurs techniques
+    
+    Args:
+        close: Prix de clôture
+        volume: Volumes échangés
+        sma_w: Fenêtre de la moyenne mobile simple
+        ema_w: Fenêtre de la moyenne mobile exponentielle
+        rsi_w: Fenêtre du RSI
+        bb_w: Fenêtre des bandes de Bollinger
+        bb_dev: Nombre d'écarts-types des bandes de Bollinger
+    
+    Returns:
+        Tableau float32 (len(FEATURE_COLUMNS), n), une ligne par indicateur
+    """
+    close = np.ascontiguousarray(close, dtype=FEATURE_DTYPE)
+    volume = np.ascontiguousarray(volume, dtype=FEATURE_DTYPE)
+    out = np.empty((len(FEATURE_COLUMNS), close.shape[0]), dtype=FEATURE_DTYPE)
+    make_kernel(sma_w, ema_w, rsi_w, bb_w, bb_dev)(close, volume, out)
+    return out
\ No newline at end of file
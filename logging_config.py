@@ -2,10 +2,97 @@
 
 import os
 import sys
+import queue
+import atexit
 import logging
 import logging.handlers
+import orjson
+
+class BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Fichier de log tournant avec tampon d'écriture
+    Le tampon n'est vidé qu'une fois plein, à la rotation, à la fermeture
+    ou pour les enregistrements de niveau WARNING et plus
+    
+    La taille du fichier est suivie par le handler : le shouldRollover
+    standard interroge la position du flux (seek/tell) à chaque
+    enregistrement, ce qui viderait le tampon à chaque fois
+    """
+    buffer_size = 64 * 1024  # 64 Ko
+    
+    # Octets écrits dans le fichier courant, et taille de l'enregistrement en cours
+    _bytes_written = 0
+    _pending_bytes = 0
+    
+    def _open(self):
+        stream = open(
+            self.baseFilename,
+            self.mode,
+            buffering=self.buffer_size,
+            encoding=self.encoding,
+            errors=self.errors
+        )
+        # Taille actuelle du fichier (mode ajout), puis suivie à chaque écriture
+        self._bytes_written = os.path.getsize(self.baseFilename)
+        return stream
+    
+    def shouldRollover(self, record):
+        if self.stream is None:
+            self.stream = self._open()
+        
+        msg = "%s%s" % (self.format(record), self.terminator)
+        self._pending_bytes = len(msg.encode(self.encoding or 'utf-8', errors=self.errors or 'strict'))
+        
+        if self.maxBytes <= 0 or not self._bytes_written:
+            return False
+        if self._bytes_written + self._pending_bytes < self.maxBytes:
+            return False
+        
+        # Pas de rotation d'un fichier spécial (/dev/null...)
+        return os.path.isfile(self.baseFilename)
+    
+    def flush(self):
+        # Le vidage systématique après chaque enregistrement est désactivé
+        pass
+    
+    def emit(self, record):
+        super().emit(record)
+        if self.stream is not None:
+            self._bytes_written += self._pending_bytes
+        if record.levelno >= logging.WARNING:
+            self._flush_stream()
+    
+    def _flush_stream(self):
+        self.acquire()
+        try:
+            if self.stream and hasattr(self.stream, "flush"):
+                self.stream.flush()
+        finally:
+            self.release()
+    
+    def close(self):
+        self._flush_stream()
+        super().close()
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Formatter ajoutant en JSON les données structurées passées via extra={'result': ...}
+    La sérialisation a lieu dans le thread du QueueListener, hors de la boucle asyncio
+    """
+    _json_options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    
+    def format(self, record):
+        message = super().format(record)
+        result = getattr(record, 'result', None)
+        if result is not None:
+            payload = orjson.dumps(result, default=str, option=self._json_options)
+            message = f"{message} {payload.decode('utf-8')}"
+        return message
 
 class LoggingConfigurator:
+    # Thread d'écriture des logs (démarré par configure_logging)
+    listener = None
+    
     @staticmethod
     def configure_logging(config):
         """Configuration sophistiquée du logging"""
@@ -13,24 +100,57 @@ class LoggingConfigurator:
         log_dir = config.LOGS_DIR
         os.makedirs(log_dir, exist_ok=True)
         
-        # Configuration du logger principal
+        # Le format n'utilise ni thread, ni processus, ni tâche asyncio :
+        # inutile de collecter ces métadonnées pour chaque enregistrement
+        logging.logThreads = False
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+        logging.logAsyncioTasks = False
+        
+        # Les handlers réels tournent dans un thread dédié alimenté par une file
+        log_q = queue.Queue(-1)
+        
+        formatter = StructuredFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        
+        # Log dans un fichier tournant
+        file_handler = BufferedRotatingFileHandler(
+            os.path.join(log_dir, 'quantum_trade.log'),
+            maxBytes=10*1024*1024,  # 10 Mo
+            backupCount=5,
+            delay=True
+        )
+        file_handler.setFormatter(formatter)
+        
+        # Log sur la console
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(formatter)
+        
+        # Configuration du logger principal : il ne fait qu'enfiler les enregistrements
         logging.basicConfig(
             level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                # Log dans un fichier tournant
-                logging.handlers.RotatingFileHandler(
-                    os.path.join(log_dir, 'quantum_trade.log'),
-                    maxBytes=10*1024*1024,  # 10 Mo
-                    backupCount=5
-                ),
-                # Log sur la console
-                logging.StreamHandler(sys.stdout)
-            ]
+            format='%(message)s',
+            handlers=[logging.handlers.QueueHandler(log_q)]
         )
         
+        LoggingConfigurator.stop_logging()
+        LoggingConfigurator.listener = logging.handlers.QueueListener(
+            log_q, file_handler, console_handler, respect_handler_level=True
+        )
+        LoggingConfigurator.listener.start()
+        atexit.register(LoggingConfigurator.stop_logging)
+        
         # Configuration des loggers spécifiques
         logging.getLogger('ccxt').setLevel(logging.WARNING)
         logging.getLogger('websockets').setLevel(logging.WARNING)
         
-        return logging.getLogger(__name__)
\ No newline at end of file
+        return logging.getLogger(__name__)
+    
+    @staticmethod
+    def stop_logging():
+        """Vide la file de logs et arrête le thread d'écriture"""
+        listener = LoggingConfigurator.listener
+        if listener is not None:
+            LoggingConfigurator.listener = None
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
\ No newline at end of file
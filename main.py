@@ -6,6 +6,13 @@ import asyncio
 import logging
 import signal
 
+# Boucle d'événements uvloop (libuv) si disponible ;
+# uvloop ne supporte pas Windows, la boucle asyncio standard est alors utilisée
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # Imports des composants du bot
 from config import UltimateTradeBotConfig
 from logging_config import LoggingConfigurator
@@ -27,7 +34,7 @@ class QuantumTradeBot:
         self.config = config
         
         # Configuration du logging
-        self.logger = LoggingConfigurator.configure_logging()
+        self.logger = LoggingConfigurator.configure_logging(config)
         
         # Initialisation des composants
         self.security_manager = SecurityManager()
@@ -57,38 +64,80 @@ class QuantumTradeBot:
             self.performance_monitor
         )
         
-        # Gestion des signaux système
-        self._setup_signal_handlers()
+        # Tâches principales (annulées à l'arrêt) et tâche d'arrêt
+        self._tasks = []
+        self._shutdown_task = None
     
-    def _setup_signal_handlers(self):
+    def _setup_signal_handlers(self, loop):
         """
         Configuration des gestionnaires de signaux système
-        Pour une fermeture propre du bot
+        Pour une fermeture propre du bot, exécutée dans la boucle asyncio
+        
+        Args:
+            loop: Boucle asyncio en cours d'exécution
         """
         for sig in [signal.SIGINT, signal.SIGTERM]:
-            signal.signal(sig, self._graceful_shutdown)
+            try:
+                loop.add_signal_handler(sig, self._request_shutdown, sig)
+            except NotImplementedError:
+                # Windows : pas de add_signal_handler, on relaie vers la boucle
+                signal.signal(
+                    sig, lambda signum, frame: loop.call_soon_threadsafe(self._request_shutdown, signum)
+                )
     
-    def _graceful_shutdown(self, signum, frame):
+    def _request_shutdown(self, signum=None):
+        """
+        Lance l'arrêt propre du bot (une seule fois)
+        
+        Args:
+            signum: Signal reçu (None en cas d'erreur critique)
+        
+        Returns:
+            Tâche d'arrêt
+        """
+        if self._shutdown_task is None:
+            self._shutdown_task = asyncio.create_task(self._async_shutdown(signum))
+        return self._shutdown_task
+    
+    async def _async_shutdown(self, signum=None):
         """
         Arrêt propre du bot
+        Arrête les tâches et vide les écritures en attente avant les rapports finaux
+        
+        Args:
+            signum: Signal reçu (None en cas d'erreur critique)
         """
-        self.logger.info(f"Signal de fermeture reçu (signal {signum}). Arrêt en cours...")
+        self.logger.info("Signal de fermeture reçu (signal %s). Arrêt en cours...", signum)
+        
+        # Arrêt des tâches de trading et de monitoring
+        for task in self._tasks:
+            task.cancel()
+        
+        # Arrêt des flux de marché et écriture des trades en attente
+        await self.market_data_manager.stop_streaming()
+        await self.trade_executor.close()
+        await asyncio.to_thread(self.performance_monitor.flush)
         
-        # Récupération du rapport de performance final
-        performance_report = self.performance_monitor.get_performance_metrics()
-        risk_report = self.risk_manager.get_risk_report()
+        # Récupération du rapport de performance final (hors de la boucle asyncio)
+        performance_report, risk_report = await asyncio.gather(
+            asyncio.to_thread(self.performance_monitor.get_performance_metrics),
+            asyncio.to_thread(self.risk_manager.get_risk_report)
+        )
         
         # Logging des rapports finaux
         self.logger.info("Rapport de performance final:")
-        for key, value in performance_report.items():
-            self.logger.info(f"{key}: {value}")
+        for key, value in (performance_report or {}).items():
+            self.logger.info("%s: %s", key, value)
         
         self.logger.info("Rapport de risque final:")
         for key, value in risk_report.items():
-            self.logger.info(f"{key}: {value}")
+            self.logger.info("%s: %s", key, value)
+        
+        # Oubli des clés API déchiffrées
+        self.security_manager.clear_decrypted_cache()
         
-        # Fermeture des ressources si nécessaire
-        sys.exit(0)
+        # Vidage des logs en attente
+        LoggingConfigurator.stop_logging()
     
     async def _monitor_system_health(self):
         """
@@ -96,15 +145,22 @@ class QuantumTradeBot:
         """
         while True:
             try:
-                # Récupération des métriques de performance
-                performance_metrics = self.performance_monitor.get_performance_metrics()
-                risk_metrics = self.risk_manager.get_risk_report()
+                # Récupération des métriques de performance (hors de la boucle asyncio)
+                performance_metrics, risk_metrics = await asyncio.gather(
+                    asyncio.to_thread(self.performance_monitor.get_performance_metrics),
+                    asyncio.to_thread(self.risk_manager.get_risk_report)
+                )
+                performance_metrics = performance_metrics or {}
                 
                 # Logging périodique
-                self.logger.info("Métriques système:")
-                self.logger.info(f"Capital actuel: {risk_metrics.get('current_capital', 0)}")
-                self.logger.info(f"Trades totaux: {performance_metrics.get('total_trades', 0)}")
-                self.logger.info(f"Trades gagnants: {performance_metrics.get('winning_trades', 0)}")
+                self.logger.info(
+                    "Métriques système",
+                    extra={'result': {
+                        'current_capital': risk_metrics.get('current_capital', 0),
+                        'total_trades': performance_metrics.get('total_trades', 0),
+                        'winning_trades': performance_metrics.get('winning_trades', 0)
+                    }}
+                )
                 
                 # Vérification des seuils critiques
                 if risk_metrics.get('max_drawdown', 0) < -self.config.MAX_RISK_PER_TRADE * 10:
@@ -114,7 +170,7 @@ class QuantumTradeBot:
                 await asyncio.sleep(3600)  # Toutes les heures
             
             except Exception as e:
-                self.logger.error(f"Erreur lors du monitoring système: {e}")
+                self.logger.error("Erreur lors du monitoring système: %s", e)
                 await asyncio.sleep(600)  # Attente en cas d'erreur
     
     async def _trading_loop(self):
@@ -123,24 +179,32 @@ class QuantumTradeBot:
         """
         while True:
             try:
+                # Génération des signaux de trading de tous les symboles en un lot
+                trade_signals = await self.trading_signal_generator.generate_signals_batch(
+                    self.config.SYMBOLS
+                )
+                
                 # Trading pour chaque symbole
                 for symbol in self.config.SYMBOLS:
-                    # Génération du signal de trading
-                    trade_signal = await self.trading_signal_generator.generate_trading_signal(symbol)
+                    trade_signal = trade_signals.get(symbol)
                     
                     # Exécution conditionnelle du trade
                     if trade_signal and trade_signal['risk_assessment']['executable']:
                         trade_result = await self.trade_executor.execute_trade(trade_signal)
                         
-                        # Logging du résultat du trade
-                        if trade_result:
-                            self.logger.info(f"Trade exécuté pour {symbol}: {trade_result}")
+                        # Logging du résultat du trade (sérialisé par le thread de logging)
+                        if trade_result and self.logger.isEnabledFor(logging.INFO):
+                            self.logger.info(
+                                "Trade exécuté pour %s",
+                                symbol,
+                                extra={'symbol': symbol, 'result': trade_result}
+                            )
                 
                 # Attente entre les cycles de trading
                 await asyncio.sleep(self.config.TRADE_CYCLE_INTERVAL)
             
             except Exception as e:
-                self.logger.error(f"Erreur dans la boucle de trading: {e}")
+                self.logger.error("Erreur dans la boucle de trading: %s", e)
                 await asyncio.sleep(60)  # Pause de sécurité
     
     async def run(self):
@@ -150,16 +214,37 @@ class QuantumTradeBot:
         try:
             self.logger.info("Démarrage de QuantumTrade Bot")
             
-            # Tâches asynchrones
-            trading_task = asyncio.create_task(self._trading_loop())
-            monitoring_task = asyncio.create_task(self._monitor_system_health())
+            # Gestion des signaux système
+            self._setup_signal_handlers(asyncio.get_running_loop())
             
-            # Attente de la complétion des tâches
-            await asyncio.gather(trading_task, monitoring_task)
+            # Flux de données de marché en temps réel
+            self.market_data_manager.start_streaming()
+            await self.trade_executor.load_markets()
+            
+            # Arrêt demandé pendant le démarrage : plus rien n'est lancé
+            # (les tâches sont créées sans point d'attente, l'arrêt les verra)
+            if self._shutdown_task is None:
+                self.trade_executor.start_streaming()
+                
+                # Tâches asynchrones
+                trading_task = asyncio.create_task(self._trading_loop())
+                monitoring_task = asyncio.create_task(self._monitor_system_health())
+                self._tasks = [trading_task, monitoring_task]
+                
+                # Attente de la complétion des tâches (annulées lors de l'arrêt)
+                await asyncio.gather(trading_task, monitoring_task)
+        
+        except asyncio.CancelledError:
+            if self._shutdown_task is None:
+                raise
         
         except Exception as e:
-            self.logger.critical(f"Erreur critique lors du démarrage: {e}")
-            self._graceful_shutdown(None, None)
+            self.logger.critical("Erreur critique lors du démarrage: %s", e)
+            self._request_shutdown()
+        
+        # Attente de la fin de l'arrêt propre avant de rendre la main à asyncio.run
+        if self._shutdown_task is not None:
+            await self._shutdown_task
 
 def main():
     """
@@ -169,11 +254,14 @@ def main():
         # Initialisation du bot
         bot = QuantumTradeBot(UltimateTradeBotConfig)
         
-        # Exécution asynchrone
-        asyncio.run(bot.run())
+        # Exécution asynchrone (uvloop.run équivaut à asyncio.run avec une boucle uvloop)
+        if uvloop is not None:
+            uvloop.run(bot.run())
+        else:
+            asyncio.run(bot.run())
     
     except Exception as e:
-        logging.critical(f"Erreur de démarrage du bot: {e}")
+        logging.critical("Erreur de démarrage du bot: %s", e)
         sys.exit(1)
 
 if __name__ == "__main__":
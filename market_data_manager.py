@@ -1,14 +1,95 @@
 # market_data_manager.py
 
 import os
+import time
+import tempfile
 import asyncio
 import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
 import numpy as np
 import pandas as pd
 import ccxt.pro as ccxtpro
-import ta
+import indicators
+
+OHLCV_COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+@dataclass(slots=True)
+class OHLCVArrays:
+    """
+    Données OHLCV stockées en colonnes NumPy contiguës
+    Un DataFrame n'est construit qu'à la persistance ou au reporting
+    """
+    ts: np.ndarray      # int64, millisecondes
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    
+    @classmethod
+    def from_ohlcv(cls, ohlcv):
+        """
+        Construction à partir de la liste de bougies renvoyée par ccxt
+        
+        Args:
+            ohlcv: Liste de [timestamp, open, high, low, close, volume]
+        
+        Returns:
+            Instance OHLCVArrays
+        """
+        columns = np.ascontiguousarray(np.asarray(ohlcv, dtype=np.float64).reshape(-1, 6).T)
+        return cls(columns[0].astype(np.int64), *columns[1:])
+    
+    @classmethod
+    def from_frame(cls, df):
+        """Construction à partir d'un DataFrame (colonnes OHLCV_COLUMNS)"""
+        return cls(
+            df['timestamp'].to_numpy(dtype=np.int64),
+            *(df[col].to_numpy(dtype=np.float64) for col in OHLCV_COLUMNS[1:])
+        )
+    
+    def to_frame(self):
+        """Conversion en DataFrame pandas"""
+        return pd.DataFrame(dict(zip(OHLCV_COLUMNS, (self.ts, self.open, self.high, self.low, self.close, self.volume))))
+    
+    def merge(self, newer, limit):
+        """
+        Fusion avec des bougies plus récentes
+        Les bougies de `newer` remplacent celles de même timestamp
+        
+        Args:
+            newer: Bougies récentes
+            limit: Nombre maximal de bougies conservées
+        
+        Returns:
+            Nouvelle instance OHLCVArrays
+        """
+        if not len(newer):
+            return self
+        
+        keep = int(np.searchsorted(self.ts, newer.ts[0]))
+        return OHLCVArrays(*(
+            np.concatenate((old[:keep], new))[-limit:]
+            for old, new in zip(
+                (self.ts, self.open, self.high, self.low, self.close, self.volume),
+                (newer.ts, newer.open, newer.high, newer.low, newer.close, newer.volume)
+            )
+        ))
+    
+    def last_ts_str(self):
+        """Horodatage UTC lisible de la dernière bougie (calculé à la demande)"""
+        if not len(self):
+            return None
+        return datetime.fromtimestamp(int(self.ts[-1]) / 1000, tz=timezone.utc).isoformat()
+    
+    def __len__(self):
+        return self.ts.shape[0]
 
 class MarketDataManager:
+    # Intervalle minimal entre deux sauvegardes du cache sur disque (secondes)
+    CACHE_FLUSH_INTERVAL = 3600
+    
     def __init__(self, config, security_manager):
         """
         Gestionnaire de données de marché avec fonctionnalités avancées
@@ -25,11 +106,21 @@ class MarketDataManager:
         self.data_dir = os.path.join(config.DATA_DIR, 'market_data')
         os.makedirs(self.data_dir, exist_ok=True)
         
+        # Préfixes des variables d'environnement des clés API par symbole
+        self._env_keys = {symbol: symbol.replace('/', '_') for symbol in config.SYMBOLS}
+        
         # Connexions aux échanges
         self.exchanges = self._initialize_exchanges()
         
-        # Cache des données
+        # Cache des données (rechargé depuis le disque s'il existe)
         self.market_data_cache = {}
+        self._last_cache_flush = {}
+        self._load_cache()
+        
+        # Flux WebSocket par (symbole, intervalle), et clés dont le cache est à jour
+        # (rattrapage REST terminé et flux sans erreur depuis)
+        self._stream_tasks = {}
+        self._live_keys = set()
         
         # Configuration de la fenêtre d'analyse
         self.analysis_windows = {
@@ -38,42 +129,131 @@ class MarketDataManager:
             'long': 500    # Long terme
         }
     
+    def _load_credentials(self):
+        """
+        Lecture des clés API (chiffrées) de chaque symbole
+        
+        Returns:
+            Dictionnaire {symbole: (clé API chiffrée, secret chiffré)}
+        """
+        return {
+            symbol: (
+                os.environ.get(f"{env_key}_API_KEY"),
+                os.environ.get(f"{env_key}_API_SECRET")
+            )
+            for symbol, env_key in self._env_keys.items()
+        }
+    
     def _initialize_exchanges(self):
         """
         Initialisation sécurisée des connexions d'échange
+        Une seule instance est créée par jeu de clés API et partagée entre
+        les symboles (pool de connexions et limiteur de débit communs)
         
         Returns:
             Dictionnaire des instances d'échange
         """
         exchanges = {}
-        for symbol in self.config.SYMBOLS:
-            try:
-                # Récupération sécurisée des clés API
-                api_key = self.security_manager.decrypt_sensitive_data(
-                    os.environ.get(f"{symbol.replace('/', '_')}_API_KEY")
-                )
-                api_secret = self.security_manager.decrypt_sensitive_data(
-                    os.environ.get(f"{symbol.replace('/', '_')}_API_SECRET")
-                )
+        shared_exchanges = {}
+        
+        for symbol, credentials in self._load_credentials().items():
+            exchange = shared_exchanges.get(credentials)
+            
+            if exchange is None:
+                try:
+                    # Récupération sécurisée des clés API
+                    encrypted_key, encrypted_secret = credentials
+                    api_key = self.security_manager.decrypt_sensitive_data(encrypted_key)
+                    api_secret = self.security_manager.decrypt_sensitive_data(encrypted_secret)
+                    
+                    # Création de l'instance d'échange
+                    exchange = ccxtpro.binance({
+                        'apiKey': api_key,
+                        'secret': api_secret,
+                        'enableRateLimit': True,
+                        'options': {
+                            'defaultType': 'spot'
+                        }
+                    })
                 
-                # Création de l'instance d'échange
-                exchange = ccxtpro.binance({
-                    'apiKey': api_key,
-                    'secret': api_secret,
-                    'enableRateLimit': True,
-                    'options': {
-                        'defaultType': 'spot'
-                    }
-                })
+                except Exception as e:
+                    self.logger.error("Erreur d'initialisation pour %s: %s", symbol, e)
+                    continue
                 
-                exchanges[symbol] = exchange
-                self.logger.info(f"Connexion initialisée pour {symbol}")
+                shared_exchanges[credentials] = exchange
             
-            except Exception as e:
-                self.logger.error(f"Erreur d'initialisation pour {symbol}: {e}")
+            exchanges[symbol] = exchange
+            self.logger.info("Connexion initialisée pour %s", symbol)
         
         return exchanges
     
+    def _cache_path(self, cache_key):
+        """Chemin du fichier feather associé à une entrée du cache"""
+        return os.path.join(self.data_dir, f"{cache_key.replace('/', '_')}.feather")
+    
+    def _load_cache(self):
+        """Chargement des données OHLCV sauvegardées lors des exécutions précédentes"""
+        for symbol in self.config.SYMBOLS:
+            for timeframe in self.config.TIMEFRAMES:
+                cache_key = f"{symbol}_{timeframe}"
+                cache_path = self._cache_path(cache_key)
+                if not os.path.exists(cache_path):
+                    continue
+                
+                try:
+                    cached = OHLCVArrays.from_frame(pd.read_feather(cache_path))
+                    self.market_data_cache[cache_key] = cached
+                    self._last_cache_flush[cache_key] = time.monotonic()
+                    self.logger.info("Cache chargé pour %s jusqu'à %s", cache_key, cached.last_ts_str())
+                except Exception as e:
+                    self.logger.warning("Cache illisible pour %s: %s", cache_key, e)
+    
+    async def _flush_cache(self, cache_key, force=False):
+        """
+        Sauvegarde périodique d'une entrée du cache sur disque
+        L'écriture a lieu dans un thread, hors de la boucle asyncio
+        
+        Args:
+            cache_key: Clé du cache (symbole_intervalle)
+            force: Sauvegarde immédiate, sans tenir compte de l'intervalle
+        """
+        now = time.monotonic()
+        last_flush = self._last_cache_flush.get(cache_key)
+        if not force and last_flush is not None and now - last_flush < self.CACHE_FLUSH_INTERVAL:
+            return
+        
+        data = self.market_data_cache.get(cache_key)
+        if data is None:
+            return
+        
+        # Marqué avant l'écriture pour ne pas planifier deux sauvegardes périodiques
+        self._last_cache_flush[cache_key] = now
+        
+        try:
+            await asyncio.to_thread(self._write_cache, data, self._cache_path(cache_key))
+        except Exception as e:
+            self.logger.warning("Erreur de sauvegarde du cache pour %s: %s", cache_key, e)
+    
+    @staticmethod
+    def _write_cache(data, cache_path):
+        """
+        Écriture d'une entrée du cache au format feather
+        Fichier temporaire puis remplacement atomique : deux écritures
+        concurrentes ou interrompues ne laissent jamais de fichier tronqué
+        
+        Args:
+            data: OHLCVArrays à sauvegarder (instance non modifiée après coup)
+            cache_path: Chemin du fichier feather
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix='.tmp')
+        os.close(fd)
+        try:
+            data.to_frame().to_feather(tmp_path)
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+    
     async def fetch_historical_data(self, symbol, timeframe='1h', limit=500):
         """
         Récupération des données historiques avec gestion avancée
@@ -84,69 +264,181 @@ class MarketDataManager:
             limit: Nombre de bougies à récupérer
         
         Returns:
-            DataFrame pandas avec données OHLCV
+            OHLCVArrays avec données OHLCV
         """
         try:
             exchange = self.exchanges.get(symbol)
             if not exchange:
-                self.logger.error(f"Pas d'échange disponible pour {symbol}")
+                self.logger.error("Pas d'échange disponible pour %s", symbol)
                 return None
             
-            # Récupération des données OHLCV
-            ohlcv = await exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+            cache_key = f"{symbol}_{timeframe}"
+            cached = self.market_data_cache.get(cache_key)
+            
+            # Récupération des seules bougies postérieures au cache
+            # (la dernière bougie en cache, potentiellement incomplète, est récupérée à nouveau)
+            ohlcv = None
+            if cached is not None and len(cached):
+                since = int(cached.ts[-1])
+                ohlcv = await exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+                
+                # Cache trop ancien : il ne rejoint pas les données récentes
+                if len(ohlcv) >= limit:
+                    cached = None
+                    ohlcv = None
+            
+            if ohlcv is None:
+                ohlcv = await exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
             
-            # Conversion en DataFrame
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
+            # Conversion en colonnes NumPy
+            data = OHLCVArrays.from_ohlcv(ohlcv)
+            
+            # Fusion avec le cache, en conservant les valeurs les plus récentes
+            if cached is not None and len(cached):
+                data = cached.merge(data, limit)
             
             # Mise en cache
-            self.market_data_cache[f"{symbol}_{timeframe}"] = df
+            self.market_data_cache[cache_key] = data
+            await self._flush_cache(cache_key)
             
-            return df
+            return data
         
         except Exception as e:
-            self.logger.error(f"Erreur lors de la récupération des données pour {symbol}: {e}")
+            self.logger.error("Erreur lors de la récupération des données pour %s: %s", symbol, e)
             return None
     
-    def extract_advanced_features(self, df):
+    def start_streaming(self):
+        """
+        Démarrage d'un flux watch_ohlcv par symbole et intervalle
+        Doit être appelé depuis la boucle asyncio
+        """
+        for symbol in self.config.SYMBOLS:
+            for timeframe in self.config.TIMEFRAMES:
+                cache_key = f"{symbol}_{timeframe}"
+                if cache_key not in self._stream_tasks:
+                    self._stream_tasks[cache_key] = asyncio.create_task(
+                        self._stream_ohlcv(symbol, timeframe)
+                    )
+    
+    async def stop_streaming(self):
+        """Arrêt des flux WebSocket et fermeture des connexions d'échange"""
+        tasks = list(self._stream_tasks.values())
+        self._stream_tasks.clear()
+        self._live_keys.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        
+        # Sauvegarde de toutes les bougies en cache, même récentes, avant l'arrêt
+        await asyncio.gather(*(
+            self._flush_cache(cache_key, force=True) for cache_key in list(self.market_data_cache)
+        ))
+        
+        for exchange in {id(exchange): exchange for exchange in self.exchanges.values()}.values():
+            try:
+                await exchange.close()
+            except Exception as e:
+                self.logger.warning("Erreur de fermeture de connexion: %s", e)
+    
+    async def _stream_ohlcv(self, symbol, timeframe):
+        """
+        Maintient le cache à jour à partir du flux WebSocket
+        Les données manquantes sont rattrapées via REST au démarrage et après
+        chaque erreur du flux ; le cache n'est servi qu'une fois ce rattrapage fait
+        
+        Args:
+            symbol: Symbole de trading
+            timeframe: Intervalle de temps
+        """
+        exchange = self.exchanges.get(symbol)
+        if not exchange:
+            return
+        
+        cache_key = f"{symbol}_{timeframe}"
+        limit = self.analysis_windows['long']
+        
+        while True:
+            try:
+                # Rattrapage REST avant de considérer le cache comme à jour
+                if cache_key not in self._live_keys:
+                    if await self.fetch_historical_data(symbol, timeframe, limit=limit) is None:
+                        await asyncio.sleep(5)
+                        continue
+                    self._live_keys.add(cache_key)
+                
+                bars = await exchange.watch_ohlcv(symbol, timeframe)
+                data = OHLCVArrays.from_ohlcv(bars)
+                
+                cached = self.market_data_cache.get(cache_key)
+                if cached is not None and len(cached):
+                    data = cached.merge(data, limit)
+                
+                self.market_data_cache[cache_key] = data
+                await self._flush_cache(cache_key)
+            
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._live_keys.discard(cache_key)
+                self.logger.error("Erreur de flux OHLCV pour %s - %s: %s", symbol, timeframe, e)
+                await asyncio.sleep(5)
+    
+    async def _get_ohlcv(self, symbol, timeframe):
+        """
+        Données OHLCV depuis le cache alimenté par le flux, ou via REST à défaut
+        
+        Args:
+            symbol: Symbole de trading
+            timeframe: Intervalle de temps
+        
+        Returns:
+            OHLCVArrays avec données OHLCV
+        """
+        cache_key = f"{symbol}_{timeframe}"
+        if cache_key in self._live_keys:
+            cached = self.market_data_cache.get(cache_key)
+            if cached is not None and len(cached) and self._is_recent(cached, timeframe):
+                return cached
+        
+        return await self.fetch_historical_data(symbol, timeframe)
+    
+    @staticmethod
+    def _is_recent(data, timeframe):
+        """
+        Vérifie que la dernière bougie date de moins de deux intervalles
+        
+        Args:
+            data: OHLCVArrays avec données OHLCV
+            timeframe: Intervalle de temps
+        
+        Returns:
+            Booléen indiquant si les données peuvent être servies
+        """
+        timeframe_ms = ccxtpro.Exchange.parse_timeframe(timeframe) * 1000
+        return int(data.ts[-1]) >= time.time() * 1000 - 2 * timeframe_ms
+    
+    def extract_advanced_features(self, data):
         """
         Extraction de features techniques avancées
         
         Args:
-            df: DataFrame avec données OHLCV
+            data: OHLCVArrays avec données OHLCV
         
         Returns:
-            DataFrame avec features supplémentaires
+            Dictionnaire {nom de l'indicateur: tableau}, prix de clôture inclus
         """
         try:
-            # Copie pour éviter les modifications directes
-            features_df = df.copy()
-            
-            # Indicateurs de tendance
-            features_df['sma_20'] = ta.trend.sma_indicator(features_df['close'], window=20)
-            features_df['ema_50'] = ta.trend.ema_indicator(features_df['close'], window=50)
-            
-            # Indicateurs de momentum
-            features_df['rsi'] = ta.momentum.rsi(features_df['close'], window=14)
+            # Tous les indicateurs (tendance, momentum, volatilité, volume, rendements) en un passage
+            features = indicators.compute_features(data.close, data.volume)
             
-            # Indicateurs de volatilité
-            bollinger = ta.volatility.BollingerBands(features_df['close'], window=20)
-            features_df['bb_high'] = bollinger.bollinger_hband()
-            features_df['bb_low'] = bollinger.bollinger_lband()
-            features_df['bb_width'] = (features_df['bb_high'] - features_df['bb_low']) / features_df['close'] * 100
+            features_by_name = dict(zip(indicators.FEATURE_COLUMNS, features))
+            features_by_name['close'] = data.close
             
-            # Indicateurs de volume
-            features_df['obv'] = ta.volume.on_balance_volume(features_df['close'], features_df['volume'])
-            
-            # Rendements
-            features_df['returns'] = features_df['close'].pct_change()
-            
-            return features_df
+            return features_by_name
         
         except Exception as e:
-            self.logger.error(f"Erreur lors de l'extraction des features: {e}")
-            return df
+            self.logger.error("Erreur lors de l'extraction des features: %s", e)
+            return {'close': data.close}
     
     async def get_multi_timeframe_features(self, symbol):
         """
@@ -160,48 +452,62 @@ class MarketDataManager:
         """
         features_by_timeframe = {}
         
-        for timeframe in self.config.TIMEFRAMES:
+        # Récupération concurrente des données de tous les intervalles
+        tasks = [self._get_ohlcv(symbol, timeframe) for timeframe in self.config.TIMEFRAMES]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        # Extraction des features dans des threads, en parallèle
+        timeframes = []
+        extractions = []
+        for timeframe, historical_data in zip(self.config.TIMEFRAMES, results):
+            if isinstance(historical_data, Exception):
+                self.logger.error("Erreur multi-timeframe pour %s - %s: %s", symbol, timeframe, historical_data)
+            elif historical_data is not None:
+                timeframes.append(timeframe)
+                extractions.append(asyncio.to_thread(self.extract_advanced_features, historical_data))
+        
+        features_list = await asyncio.gather(*extractions, return_exceptions=True)
+        
+        for timeframe, features in zip(timeframes, features_list):
             try:
-                # Récupération des données
-                historical_data = await self.fetch_historical_data(symbol, timeframe)
-                
-                if historical_data is not None:
-                    # Extraction des features
-                    features = self.extract_advanced_features(historical_data)
-                    features_by_timeframe[timeframe] = features.iloc[-1].to_dict()
+                if isinstance(features, Exception):
+                    raise features
+                features_by_timeframe[timeframe] = {
+                    name: float(values[-1]) for name, values in features.items()
+                }
             
             except Exception as e:
-                self.logger.error(f"Erreur multi-timeframe pour {symbol} - {timeframe}: {e}")
+                self.logger.error("Erreur multi-timeframe pour %s - %s: %s", symbol, timeframe, e)
         
         return features_by_timeframe
     
-    async def detect_market_regime(self, symbol):
+    async def detect_market_regime(self, symbol, features=None):
         """
         Détection du régime de marché
         
         Args:
             symbol: Symbole de trading
+            features: Features multi-timeframe déjà calculées (récupérées sinon)
         
         Returns:
             Dictionnaire avec régime de marché
         """
         try:
             # Récupération des données sur différentes fenêtres
-            features = await self.get_multi_timeframe_features(symbol)
+            if features is None:
+                features = await self.get_multi_timeframe_features(symbol)
             
             # Analyse de la volatilité
-            volatility_indicators = [
-                features.get('1h', {}).get('bb_width', 0),
+            avg_volatility = (
+                features.get('1h', {}).get('bb_width', 0) +
                 features.get('4h', {}).get('bb_width', 0)
-            ]
-            avg_volatility = np.mean(volatility_indicators)
+            ) * 0.5
             
             # Analyse de la tendance
-            trend_indicators = [
-                features.get('1h', {}).get('rsi', 50),
+            avg_trend = (
+                features.get('1h', {}).get('rsi', 50) +
                 features.get('4h', {}).get('rsi', 50)
-            ]
-            avg_trend = np.mean(trend_indicators)
+            ) * 0.5
             
             # Détermination du régime
             if avg_volatility > 3 and abs(avg_trend - 50) > 10:
@@ -225,7 +531,7 @@ class MarketDataManager:
             }
         
         except Exception as e:
-            self.logger.error(f"Erreur de détection du régime de marché pour {symbol}: {e}")
+            self.logger.error("Erreur de détection du régime de marché pour %s: %s", symbol, e)
             return {
                 'regime': 'neutral',
                 'confidence': 0.5,
@@ -1,139 +1,219 @@
 # performance_monitor.py
 
 import os
+import time
+import queue
 import sqlite3
 import logging
-from datetime import datetime, timedelta
+import threading
+from datetime import datetime, timedelta, timezone
 
 class PerformanceMonitoringSystem:
     def __init__(self, config):
         self.config = config
         self.db_path = os.path.join(config.DATA_DIR, "performance.db")
         self.logger = logging.getLogger(__name__)
+        
+        # Verrou protégeant la connexion partagée entre threads
+        self._db_lock = threading.Lock()
         self._initialize_database()
+        
+        # File d'écriture vidée par lots par un thread dédié
+        self._write_q = queue.Queue()
+        self._writer = threading.Thread(target=self._writer_loop, name='trade-writer', daemon=True)
+        self._writer.start()
     
     def _initialize_database(self):
         """Initialisation de la base de données de performance"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Table des trades individuels
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS trades (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        symbol TEXT,
-                        side TEXT,
-                        quantity REAL,
-                        entry_price REAL,
-                        exit_price REAL,
-                        profit_loss REAL,
-                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                
-                # Table des performances quotidiennes
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS daily_performance (
-                        date DATE PRIMARY KEY,
-                        total_trades INTEGER,
-                        winning_trades INTEGER,
-                        total_profit REAL,
-                        max_drawdown REAL,
-                        capital_end REAL
-                    )
-                ''')
-                
-                conn.commit()
+            # Connexion unique conservée pour toute la durée du processus
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            self.conn.executescript('''
+                PRAGMA journal_mode=WAL;
+                PRAGMA synchronous=NORMAL;
+                PRAGMA temp_store=MEMORY;
+                PRAGMA mmap_size=268435456;
+            ''')
+            
+            cursor = self.conn.cursor()
+            
+            # Table des trades individuels
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS trades (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    symbol TEXT,
+                    side TEXT,
+                    quantity REAL,
+                    entry_price REAL,
+                    exit_price REAL,
+                    profit_loss REAL,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Table des performances quotidiennes
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS daily_performance (
+                    date DATE PRIMARY KEY,
+                    total_trades INTEGER,
+                    winning_trades INTEGER,
+                    total_profit REAL,
+                    max_drawdown REAL,
+                    capital_end REAL
+                )
+            ''')
+            
+            # Agrégation quotidienne maintenue incrémentalement à chaque trade
+            # Un profit_loss NULL est ignoré par la somme et le minimum (comme SUM/MIN)
+            # (recréé à chaque démarrage pour remplacer une définition antérieure)
+            cursor.execute('DROP TRIGGER IF EXISTS trades_daily_agg')
+            cursor.execute('''
+                CREATE TRIGGER trades_daily_agg AFTER INSERT ON trades
+                BEGIN
+                    INSERT INTO daily_performance 
+                    (date, total_trades, winning_trades, total_profit, max_drawdown, capital_end)
+                    VALUES (date(NEW.timestamp), 1, COALESCE(NEW.profit_loss > 0, 0), NEW.profit_loss, NEW.profit_loss, 0)
+                    ON CONFLICT(date) DO UPDATE SET
+                        total_trades = COALESCE(total_trades, 0) + 1,
+                        winning_trades = COALESCE(winning_trades, 0) + COALESCE(NEW.profit_loss > 0, 0),
+                        total_profit = COALESCE(total_profit + NEW.profit_loss, total_profit, NEW.profit_loss),
+                        max_drawdown = COALESCE(MIN(max_drawdown, NEW.profit_loss), max_drawdown, NEW.profit_loss);
+                END
+            ''')
+            
+            # Index pour les agrégations par période et par symbole
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_trades_ts_sym ON trades(timestamp, symbol)
+            ''')
+            
+            # Requêtes de métriques constantes : compilées une fois puis réutilisées
+            # par le cache de requêtes préparées de sqlite3
+            self._metrics_stmt_all = '''
+                SELECT 
+                    COUNT(*) as total_trades,
+                    SUM(CASE WHEN profit_loss > 0 THEN 1 ELSE 0 END) as winning_trades,
+                    SUM(profit_loss) as total_profit,
+                    MIN(profit_loss) as max_drawdown,
+                    AVG(profit_loss) as average_trade_profit
+                FROM trades
+                WHERE timestamp >= ?
+            '''
+            self._metrics_stmt_symbol = self._metrics_stmt_all + " AND symbol = ?"
         except Exception as e:
-            self.logger.error(f"Erreur d'initialisation de la base de données: {e}")
+            self.logger.error("Erreur d'initialisation de la base de données: %s", e)
+    
+    _INSERT_TRADE = '''
+        INSERT INTO trades 
+        (symbol, side, quantity, entry_price, exit_price, profit_loss) 
+        VALUES (?, ?, ?, ?, ?, ?)
+    '''
+    
+    @staticmethod
+    def _trade_row(trade_data):
+        """Conversion d'un trade en ligne SQL"""
+        return (
+            trade_data['symbol'],
+            trade_data['side'],
+            trade_data['quantity'],
+            trade_data['entry_price'],
+            trade_data.get('exit_price'),
+            trade_data.get('profit_loss', 0)
+        )
+    
+    _WRITE_BATCH_SIZE = 256
+    _WRITE_BATCH_TIMEOUT = 0.1  # secondes
     
     def record_trade(self, trade_data):
-        """Enregistrement détaillé d'un trade"""
+        """Enregistrement détaillé d'un trade (mis en file, écrit en arrière-plan)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO trades 
-                    (symbol, side, quantity, entry_price, exit_price, profit_loss) 
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    trade_data['symbol'],
-                    trade_data['side'],
-                    trade_data['quantity'],
-                    trade_data['entry_price'],
-                    trade_data.get('exit_price'),
-                    trade_data.get('profit_loss', 0)
-                ))
-                conn.commit()
+            self._write_q.put_nowait(trade_data)
         except Exception as e:
-            self.logger.error(f"Erreur lors de l'enregistrement du trade: {e}")
+            self.logger.error("Erreur lors de l'enregistrement du trade: %s", e)
+    
+    def _writer_loop(self):
+        """
+        Boucle du thread d'écriture
+        Regroupe jusqu'à _WRITE_BATCH_SIZE trades ou attend _WRITE_BATCH_TIMEOUT
+        avant de les écrire dans une seule transaction
+        """
+        while True:
+            batch = [self._write_q.get()]
+            deadline = time.monotonic() + self._WRITE_BATCH_TIMEOUT
+            
+            while len(batch) < self._WRITE_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._write_q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            self.record_trade_batch(batch)
+            for _ in batch:
+                self._write_q.task_done()
+    
+    def flush(self):
+        """Attend que tous les trades en file soient écrits en base"""
+        self._write_q.join()
+    
+    def record_trade_batch(self, trades):
+        """Enregistrement d'un lot de trades dans une seule transaction"""
+        # Un trade mal formé est écarté seul, sans perdre le reste du lot
+        rows = []
+        for trade_data in trades:
+            try:
+                rows.append(self._trade_row(trade_data))
+            except Exception as e:
+                self.logger.error("Trade mal formé ignoré (%s): %r", e, trade_data)
+        
+        if not rows:
+            return
+        
+        try:
+            with self._db_lock:
+                self.conn.execute('BEGIN')
+                try:
+                    self.conn.executemany(self._INSERT_TRADE, rows)
+                except Exception:
+                    self.conn.execute('ROLLBACK')
+                    raise
+                self.conn.execute('COMMIT')
+        except Exception as e:
+            self.logger.error("Erreur lors de l'enregistrement du lot de trades: %s", e)
     
     def update_daily_performance(self, capital_end):
         """Mise à jour des performances quotidiennes"""
         try:
-            today = datetime.now().date()
-            
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Récupérer les trades de la journée
-                cursor.execute('''
-                    SELECT 
-                        COUNT(*) as total_trades,
-                        SUM(CASE WHEN profit_loss > 0 THEN 1 ELSE 0 END) as winning_trades,
-                        SUM(profit_loss) as total_profit,
-                        MIN(profit_loss) as max_drawdown
-                    FROM trades
-                    WHERE date(timestamp) = ?
-                ''', (today,))
-                
-                performance = cursor.fetchone()
-                
-                # Insérer/Mettre à jour les performances
-                cursor.execute('''
-                    INSERT OR REPLACE INTO daily_performance 
+            # Les agrégats du jour sont tenus à jour par le trigger trades_daily_agg
+            # (dates UTC, comme l'horodatage des trades)
+            with self._db_lock:
+                self.conn.execute('''
+                    INSERT INTO daily_performance 
                     (date, total_trades, winning_trades, total_profit, max_drawdown, capital_end)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    today, 
-                    performance[0], 
-                    performance[1], 
-                    performance[2], 
-                    performance[3],
-                    capital_end
-                ))
-                
-                conn.commit()
+                    VALUES (date('now'), 0, 0, 0, NULL, ?)
+                    ON CONFLICT(date) DO UPDATE SET capital_end = excluded.capital_end
+                ''', (capital_end,))
         except Exception as e:
-            self.logger.error(f"Erreur lors de la mise à jour des performances quotidiennes: {e}")
+            self.logger.error("Erreur lors de la mise à jour des performances quotidiennes: %s", e)
     
     def get_performance_metrics(self, symbol=None, days=30):
-        """Extraction des métriques de performance"""
+        """Extraction des métriques de performance (dictionnaire indexé par métrique)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Requête de base
-                query = """
-                    SELECT 
-                        COUNT(*) as total_trades,
-                        SUM(CASE WHEN profit_loss > 0 THEN 1 ELSE 0 END) as winning_trades,
-                        SUM(profit_loss) as total_profit,
-                        MIN(profit_loss) as max_drawdown,
-                        AVG(profit_loss) as average_trade_profit
-                    FROM trades
-                    WHERE timestamp >= date('now', ?)
-                """
-                
-                # Ajout du filtre sur le symbole si spécifié
-                params = [f'-{days} days']
-                if symbol:
-                    query += " AND symbol = ?"
-                    params.append(symbol)
-                
-                cursor.execute(query, params)
-                return cursor.fetchone()
+            # Date de début de la période (même borne que date('now', '-N days'))
+            cutoff = (datetime.now(timezone.utc).date() - timedelta(days=days)).isoformat()
+            
+            # Ajout du filtre sur le symbole si spécifié
+            if symbol:
+                query, params = self._metrics_stmt_symbol, (cutoff, symbol)
+            else:
+                query, params = self._metrics_stmt_all, (cutoff,)
+            
+            with self._db_lock:
+                cursor = self.conn.execute(query, params)
+                row = cursor.fetchone()
+            
+            return dict(zip((column[0] for column in cursor.description), row))
         except Exception as e:
-            self.logger.error(f"Erreur lors de la récupération des métriques: {e}")
+            self.logger.error("Erreur lors de la récupération des métriques: %s", e)
             return None
\ No newline at end of file
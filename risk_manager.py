@@ -2,9 +2,13 @@
 
 import numpy as np
 import logging
-from typing import Dict, Any, List
+from collections import deque
+from typing import Dict, Any, Deque
 
 class RiskManagementSystem:
+    # Nombre de trades conservés dans l'historique (les métriques couvrent tous les trades)
+    TRADE_HISTORY_SIZE = 10_000
+    
     def __init__(self, config, initial_capital: float = 10000.0):
         """
         Système de gestion des risques avec plusieurs mécanismes de protection
@@ -17,8 +21,16 @@ class RiskManagementSystem:
         self.initial_capital = initial_capital
         self.current_capital = initial_capital
         
-        # Historique des trades et statistiques
-        self.trade_history: List[Dict[str, Any]] = []
+        # Historique borné des trades et statistiques
+        self.trade_history: Deque[Dict[str, Any]] = deque(maxlen=self.TRADE_HISTORY_SIZE)
+        
+        # Statistiques courantes des profits/pertes pour une mise à jour en O(1)
+        # (moyenne et somme des carrés des écarts M2 de Welford, numériquement stables)
+        self._n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._min = np.inf
+        self._n_win = 0
         
         # Paramètres de risk management
         self.max_risk_per_trade = config.MAX_RISK_PER_TRADE
@@ -66,7 +78,7 @@ class RiskManagementSystem:
             
             return position_size
         except Exception as e:
-            self.logger.error(f"Erreur de calcul de taille de position pour {symbol}: {e}")
+            self.logger.error("Erreur de calcul de taille de position pour %s: %s", symbol, e)
             return 0
     
     def assess_trade_risk(self, trade_signal: float, market_conditions: Dict[str, Any]) -> Dict[str, Any]:
@@ -92,14 +104,12 @@ class RiskManagementSystem:
             volatility = market_conditions.get('volatility', 0.5)
             trend_strength = market_conditions.get('trend_strength', 0.5)
             
-            # Calcul du score de risque
-            risk_components = [
-                abs(trade_signal) * 0.4,      # Force du signal
-                volatility * 0.3,             # Volatilité du marché
+            # Calcul du score de risque (moyenne des composantes, en arithmétique Python)
+            risk_score = (
+                abs(trade_signal) * 0.4 +     # Force du signal
+                volatility * 0.3 +            # Volatilité du marché
                 (1 - trend_strength) * 0.3    # Incertitude de la tendance
-            ]
-            
-            risk_score = np.mean(risk_components)
+            ) / 3.0
             
             # Décision d'exécution basée sur le score de risque
             risk_assessment['risk_score'] = risk_score
@@ -109,7 +119,7 @@ class RiskManagementSystem:
             risk_assessment['position_size_percent'] = max(0.01, min(self.max_risk_per_trade, risk_score))
             
         except Exception as e:
-            self.logger.error(f"Erreur d'évaluation des risques: {e}")
+            self.logger.error("Erreur d'évaluation des risques: %s", e)
         
         return risk_assessment
     
@@ -127,37 +137,53 @@ class RiskManagementSystem:
             
             # Enregistrement du trade
             self.trade_history.append(trade_result)
+            self._record_profit(profit_loss)
             
             # Mise à jour des métriques
             self._update_risk_metrics()
         except Exception as e:
-            self.logger.error(f"Erreur de mise à jour des métriques: {e}")
+            self.logger.error("Erreur de mise à jour des métriques: %s", e)
+    
+    def _record_profit(self, profit_loss: float):
+        """
+        Met à jour les statistiques courantes avec un profit/perte (algorithme de Welford)
+        
+        Args:
+            profit_loss: Profit ou perte du trade
+        """
+        profit_loss = float(profit_loss)
+        self._n += 1
+        
+        delta = profit_loss - self._mean
+        self._mean += delta / self._n
+        self._m2 += delta * (profit_loss - self._mean)
+        self._min = min(self._min, profit_loss)
+        if profit_loss > 0:
+            self._n_win += 1
     
     def _update_risk_metrics(self):
-        """Calcul des métriques de risque internes"""
-        if not self.trade_history:
+        """Calcul des métriques de risque internes à partir des statistiques courantes"""
+        if self._n == 0:
             return
         
-        # Extraire les profits/pertes
-        profits = [trade['profit_loss'] for trade in self.trade_history]
+        n = self._n
         
         # Mise à jour des statistiques de base
         self.risk_metrics.update({
-            'total_trades': len(self.trade_history),
-            'winning_trades': sum(1 for p in profits if p > 0),
-            'losing_trades': sum(1 for p in profits if p <= 0),
-            'max_drawdown': min(profits),
-            'max_drawdown_percent': min(profits) / self.initial_capital * 100
+            'total_trades': n,
+            'winning_trades': self._n_win,
+            'losing_trades': n - self._n_win,
+            'max_drawdown': self._min,
+            'max_drawdown_percent': self._min / self.initial_capital * 100
         })
         
-        # Calcul du ratio de Sharpe (approximatif)
+        # Calcul du ratio de Sharpe (approximatif), écart-type de population
+        # (le ratio est invariant par la normalisation par le capital initial)
         try:
-            returns = np.array(profits) / self.initial_capital
-            self.risk_metrics['sharpe_ratio'] = (
-                np.mean(returns) / np.std(returns) if np.std(returns) > 0 else 0
-            )
+            std = np.sqrt(self._m2 / n)
+            self.risk_metrics['sharpe_ratio'] = self._mean / std if std > 0 else 0
         except Exception as e:
-            self.logger.warning(f"Erreur de calcul du Sharpe Ratio: {e}")
+            self.logger.warning("Erreur de calcul du Sharpe Ratio: %s", e)
     
     def get_risk_report(self) -> Dict[str, Any]:
         """
@@ -1,37 +1,79 @@
 # security_manager.py
 
-import os
 import base64
+import hashlib
+import logging
 import nacl.secret
 import nacl.utils
-import hashlib
+from argon2 import PasswordHasher
 
 class SecurityManager:
+    # Nombre maximal de hash de clés API conservés
+    HASH_CACHE_SIZE = 128
+    
     def __init__(self, secret_key=None):
         self.secret_key = secret_key or self._generate_secret_key()
         self.encryption_box = nacl.secret.SecretBox(self.secret_key)
+        
+        # Cache des données déchiffrées, indexé par le texte chiffré
+        self._decrypted_cache = {}
+        
+        # Hachage Argon2id des clés API (résistant en mémoire, peu d'itérations)
+        self.password_hasher = PasswordHasher(time_cost=2, memory_cost=64*1024, parallelism=1)
+        
+        # Hash Argon2id mémorisé par empreinte de clé API (jamais la clé en clair)
+        self._hash_cache = {}
     
     def _generate_secret_key(self):
         """Génère une clé secrète sécurisée"""
         return nacl.utils.random(nacl.secret.SecretBox.KEY_SIZE)
     
+    def _encrypt_bytes(self, data: bytes) -> bytes:
+        """Chiffrement brut : octets en clair -> nonce + texte chiffré"""
+        return self.encryption_box.encrypt(data)
+    
+    def _decrypt_bytes(self, blob: bytes) -> bytes:
+        """Déchiffrement brut : nonce + texte chiffré -> octets en clair"""
+        return self.encryption_box.decrypt(blob)
+    
     def encrypt_sensitive_data(self, data):
-        """Chiffrement de données sensibles"""
-        encrypted = self.encryption_box.encrypt(data.encode('utf-8'))
-        return base64.b64encode(encrypted).decode('utf-8')
+        """Chiffrement de données sensibles (texte base64)"""
+        return base64.b64encode(self._encrypt_bytes(data.encode('utf-8'))).decode('ascii')
     
     def decrypt_sensitive_data(self, encrypted_data):
-        """Déchiffrement de données sensibles"""
+        """Déchiffrement de données sensibles (mis en cache par texte chiffré)"""
+        cached = self._decrypted_cache.get(encrypted_data)
+        if cached is not None:
+            return cached
+        
         try:
-            decoded = base64.b64decode(encrypted_data.encode('utf-8'))
-            decrypted = self.encryption_box.decrypt(decoded)
-            return decrypted.decode('utf-8')
+            # b64decode accepte directement une chaîne ASCII
+            decrypted = self._decrypt_bytes(base64.b64decode(encrypted_data)).decode('utf-8')
         except Exception as e:
-            logging.error(f"Erreur de déchiffrement: {e}")
+            logging.error("Erreur de déchiffrement: %s", e)
             return None
+        
+        self._decrypted_cache[encrypted_data] = decrypted
+        return decrypted
+    
+    def clear_decrypted_cache(self):
+        """Oubli des données déchiffrées et des hash de clés API en cache"""
+        self._decrypted_cache.clear()
+        self._hash_cache.clear()
     
     def generate_api_key_hash(self, api_key):
-        """Génère un hash sécurisé pour les clés API"""
-        salt = os.urandom(16)
-        key_hash = hashlib.pbkdf2_hmac('sha256', api_key.encode('utf-8'), salt, 100000)
-        return base64.b64encode(salt + key_hash).decode('utf-8')
\ No newline at end of file
+        """Génère un hash sécurisé pour les clés API (format PHC Argon2id, sel inclus, mis en cache)"""
+        fingerprint = self.api_key_fingerprint(api_key)
+        api_key_hash = self._hash_cache.get(fingerprint)
+        
+        if api_key_hash is None:
+            # Cache borné : la plus ancienne entrée est évincée
+            if len(self._hash_cache) >= self.HASH_CACHE_SIZE:
+                del self._hash_cache[next(iter(self._hash_cache))]
+            api_key_hash = self._hash_cache[fingerprint] = self.password_hasher.hash(api_key)
+        
+        return api_key_hash
+    
+    def api_key_fingerprint(self, api_key):
+        """Empreinte courte d'une clé API pour les logs (BLAKE2b à clé, sans coût de dérivation)"""
+        return hashlib.blake2b(api_key.encode('utf-8'), digest_size=16, key=self.secret_key[:32]).hexdigest()
\ No newline at end of file
@@ -1,11 +1,25 @@
 # trade_executor.py
 
 import os
+import time
+import heapq
 import asyncio
 import logging
-import ccxt
+import ccxt.pro as ccxtpro
+from datetime import datetime
 from typing import Dict, Any, Optional
 
+# Côtés des ordres
+BUY = 'buy'
+SELL = 'sell'
+
+# Paramètres Binance des ordres au marché : fenêtre de réception explicite
+# et réponse ACK (identifiant seul, sans tableau des exécutions à décoder)
+ORDER_PARAMS = {'recvWindow': 5000, 'newOrderRespType': 'ACK'}
+
+# Durée de validité (secondes) d'un instantané fetch_tickers
+TICKER_SNAPSHOT_TTL = 2.0
+
 class TradeExecutor:
     def __init__(self, config, security_manager, risk_manager, performance_monitor):
         """
@@ -24,19 +38,35 @@ class TradeExecutor:
         
         self.logger = logging.getLogger(__name__)
         
+        # Devise de cotation et préfixe des variables d'environnement par symbole
+        self._quote = {symbol: symbol.split('/')[1] for symbol in config.SYMBOLS}
+        self._envkey = {symbol: symbol.replace('/', '_') for symbol in config.SYMBOLS}
+        
         # Initialisation des connexions d'échange
         self.exchanges = self._initialize_exchanges()
         
-        # États des trades en cours
+        # États des trades en cours et tas des échéances (échéance monotone, symbole)
         self.active_trades = {}
+        self._expiry_heap = []
+        
+        # Derniers tickers (par symbole) et soldes (par échange) reçus par WebSocket
+        self._ticker_cache = {}
+        self._balance_cache = {}
+        self._stream_tasks = []
+        
+        # Instantanés REST des tickers par échange : (instant monotone, tickers),
+        # et requête fetch_tickers en cours, partagée entre les appelants
+        self._ticker_snapshots = {}
+        self._snapshot_tasks = {}
         
         # Configuration des limites de trading
         self.trade_limits = {
             'max_open_trades': 3,
             'max_trade_duration_hours': 24
         }
+        self._max_trade_seconds = self.trade_limits['max_trade_duration_hours'] * 3600
     
-    def _initialize_exchanges(self) -> Dict[str, ccxt.Exchange]:
+    def _initialize_exchanges(self) -> Dict[str, ccxtpro.Exchange]:
         """
         Initialisation sécurisée des connexions d'échange
         
@@ -44,34 +74,129 @@ class TradeExecutor:
             Dictionnaire des instances d'échange
         """
         exchanges = {}
+        
+        # Une instance par jeu de clés API, partagée entre les symboles
+        # (marchés, limiteur de débit et sessions HTTP communs)
+        shared_exchanges = {}
+        
         for symbol in self.config.SYMBOLS:
             try:
                 # Récupération sécurisée des clés API
-                api_key = self.security_manager.decrypt_sensitive_data(
-                    os.environ.get(f"{symbol.replace('/', '_')}_API_KEY")
-                )
-                api_secret = self.security_manager.decrypt_sensitive_data(
-                    os.environ.get(f"{symbol.replace('/', '_')}_API_SECRET")
-                )
+                # (le déchiffrement n'a lieu qu'une fois par valeur chiffrée)
+                env_key = self._envkey[symbol]
+                encrypted_key = os.environ.get(f"{env_key}_API_KEY")
+                encrypted_secret = os.environ.get(f"{env_key}_API_SECRET")
                 
-                # Création de l'instance d'échange
-                exchange = getattr(ccxt, 'binance')({
-                    'apiKey': api_key,
-                    'secret': api_secret,
-                    'enableRateLimit': True,
-                    'options': {
-                        'defaultType': 'spot'
-                    }
-                })
+                credentials = (encrypted_key, encrypted_secret)
+                exchange = shared_exchanges.get(credentials)
+                
+                if exchange is None:
+                    api_key = self.security_manager.decrypt_sensitive_data(encrypted_key)
+                    api_secret = self.security_manager.decrypt_sensitive_data(encrypted_secret)
+                    
+                    # Création de l'instance d'échange
+                    exchange = ccxtpro.binance({
+                        'apiKey': api_key,
+                        'secret': api_secret,
+                        'enableRateLimit': True,
+                        'options': {
+                            'defaultType': 'spot',
+                            # Solde complet (REST) chargé avant d'appliquer les mises à jour
+                            # du flux : sans lui, watch_balance ne connaît que les actifs vus
+                            'watchBalance': {
+                                'fetchBalanceSnapshot': True,
+                                'awaitBalanceSnapshot': True
+                            }
+                        }
+                    })
+                    shared_exchanges[credentials] = exchange
                 
                 exchanges[symbol] = exchange
-                self.logger.info(f"Connexion échange initialisée pour {symbol}")
+                self.logger.info("Connexion échange initialisée pour %s", symbol)
             
             except Exception as e:
-                self.logger.error(f"Erreur d'initialisation de l'échange pour {symbol}: {e}")
+                self.logger.error("Erreur d'initialisation de l'échange pour %s: %s", symbol, e)
         
         return exchanges
     
+    def _unique_exchanges(self):
+        """Instances d'échange distinctes (partagées entre symboles)"""
+        return list({id(exchange): exchange for exchange in self.exchanges.values()}.values())
+    
+    async def load_markets(self):
+        """Chargement concurrent des marchés de toutes les instances d'échange"""
+        exchanges = self._unique_exchanges()
+        results = await asyncio.gather(
+            *(exchange.load_markets() for exchange in exchanges),
+            return_exceptions=True
+        )
+        for exchange, result in zip(exchanges, results):
+            if isinstance(result, Exception):
+                self.logger.error("Erreur de chargement des marchés (%s): %s", exchange.id, result)
+    
+    def start_streaming(self):
+        """
+        Démarrage des flux watch_ticker (par symbole) et watch_balance (par échange)
+        Doit être appelé depuis la boucle asyncio
+        """
+        if self._stream_tasks:
+            return
+        
+        for symbol, exchange in self.exchanges.items():
+            self._stream_tasks.append(asyncio.create_task(self._stream_ticker(exchange, symbol)))
+        for exchange in self._unique_exchanges():
+            self._stream_tasks.append(asyncio.create_task(self._stream_balance(exchange)))
+    
+    async def _stream_ticker(self, exchange, symbol):
+        """
+        Maintient le cache du ticker d'un symbole à partir du flux WebSocket
+        
+        Args:
+            exchange: Instance de l'échange
+            symbol: Symbole de trading
+        """
+        while True:
+            try:
+                self._ticker_cache[symbol] = await exchange.watch_ticker(symbol)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Plus de prix figé pendant la reconnexion : REST prend le relais
+                self._ticker_cache.pop(symbol, None)
+                self.logger.error("Erreur de flux ticker pour %s: %s", symbol, e)
+                await asyncio.sleep(5)
+    
+    async def _stream_balance(self, exchange):
+        """
+        Maintient le cache du solde d'un compte à partir du flux WebSocket
+        
+        Args:
+            exchange: Instance de l'échange
+        """
+        while True:
+            try:
+                self._balance_cache[exchange] = await exchange.watch_balance()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Plus de solde figé pendant la reconnexion : REST prend le relais
+                self._balance_cache.pop(exchange, None)
+                self.logger.error("Erreur de flux de solde: %s", e)
+                await asyncio.sleep(5)
+    
+    async def close(self):
+        """Arrêt des flux et fermeture des connexions d'échange"""
+        tasks, self._stream_tasks = self._stream_tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        
+        for exchange in self._unique_exchanges():
+            try:
+                await exchange.close()
+            except Exception as e:
+                self.logger.warning("Erreur de fermeture de connexion: %s", e)
+    
     async def execute_trade(self, trade_signal: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
         Exécution du trade avec gestion avancée des risques
@@ -87,32 +212,39 @@ class TradeExecutor:
         try:
             # Vérification des limites de trading
             if not self._can_open_new_trade(symbol):
-                self.logger.warning(f"Limite de trades atteinte pour {symbol}")
+                self.logger.warning("Limite de trades atteinte pour %s", symbol)
                 return None
             
             # Récupération de l'échange
             exchange = self.exchanges.get(symbol)
             if not exchange:
-                self.logger.error(f"Pas d'échange disponible pour {symbol}")
+                self.logger.error("Pas d'échange disponible pour %s", symbol)
                 return None
             
-            # Récupération du ticker et du prix actuel
-            ticker = await exchange.fetch_ticker(symbol)
-            current_price = ticker['last']
+            # Signal neutre : ni achat, ni vente
+            if trade_signal['signal'] == 0:
+                self.logger.info("Signal neutre pour %s, pas de trade", symbol)
+                return None
             
             # Gestion des risques
             risk_assessment = trade_signal['risk_assessment']
             if not risk_assessment['executable']:
-                self.logger.info(f"Trade non exécutable pour {symbol} - Risque trop élevé")
+                self.logger.info("Trade non exécutable pour %s - Risque trop élevé", symbol)
                 return None
             
+            # Récupération concurrente du ticker et du solde
+            ticker, balance = await asyncio.gather(
+                self._get_ticker(exchange, symbol),
+                self._get_available_balance(exchange, symbol)
+            )
+            current_price = ticker['last']
+            
             # Calcul de la quantité
-            balance = await self._get_available_balance(exchange, symbol)
             position_size = risk_assessment['position_size_percent'] * balance
             quantity = position_size / current_price
             
             # Détermination du côté du trade
-            side = 'buy' if trade_signal['signal'] > 0 else 'sell'
+            side = BUY if trade_signal['signal'] > 0 else SELL
             
             # Exécution du trade
             order = await self._place_order(
@@ -134,13 +266,14 @@ class TradeExecutor:
             
             # Mise à jour des gestionnaires
             self.active_trades[symbol] = trade_result
+            heapq.heappush(self._expiry_heap, (trade_result['ts'] + self._max_trade_seconds, symbol))
             self.risk_manager.update_capital_and_metrics(trade_result)
             self.performance_monitor.record_trade(trade_result)
             
             return trade_result
         
         except Exception as e:
-            self.logger.error(f"Erreur lors de l'exécution du trade pour {symbol}: {e}")
+            self.logger.error("Erreur lors de l'exécution du trade pour %s: %s", symbol, e)
             return None
     
     async def _place_order(self, exchange, symbol, side, quantity, price):
@@ -158,17 +291,14 @@ class TradeExecutor:
             Résultat de l'ordre
         """
         try:
-            # Méthode de placement d'ordre adaptative
-            if side == 'buy':
-                order = await exchange.create_market_buy_order(symbol, quantity)
-            else:
-                order = await exchange.create_market_sell_order(symbol, quantity)
+            # Chemin unique create_order (copie des paramètres, que ccxt peut modifier)
+            order = await exchange.create_order(symbol, 'market', side, quantity, None, dict(ORDER_PARAMS))
             
-            self.logger.info(f"Ordre {side} exécuté pour {symbol}: {quantity} @ {price}")
+            self.logger.info("Ordre %s exécuté pour %s: %s @ %s", side, symbol, quantity, price)
             return order
         
         except Exception as e:
-            self.logger.error(f"Erreur de placement d'ordre {side} pour {symbol}: {e}")
+            self.logger.error("Erreur de placement d'ordre %s pour %s: %s", side, symbol, e)
             raise
     
     def _can_open_new_trade(self, symbol: str) -> bool:
@@ -181,24 +311,32 @@ class TradeExecutor:
         Returns:
             Booléen indiquant si un nouveau trade est possible
         """
+        # Fermeture automatique des trades ayant dépassé la durée maximale
+        self._expire_trades(time.monotonic())
+        
         # Vérification du nombre maximum de trades ouverts
         if len(self.active_trades) >= self.trade_limits['max_open_trades']:
             return False
         
         # Vérification de l'existence d'un trade actif pour ce symbole
-        if symbol in self.active_trades:
-            trade = self.active_trades[symbol]
-            trade_duration = (datetime.now() - trade['timestamp']).total_seconds() / 3600
+        return symbol not in self.active_trades
+    
+    def _expire_trades(self, now: float):
+        """
+        Fermeture des trades dont l'échéance est passée
+        
+        Args:
+            now: Instant courant (time.monotonic())
+        """
+        heap = self._expiry_heap
+        
+        while heap and heap[0][0] < now:
+            _, symbol = heapq.heappop(heap)
             
-            # Vérification de la durée maximale du trade
-            if trade_duration > self.trade_limits['max_trade_duration_hours']:
-                # Fermeture automatique du trade si durée dépassée
+            # Entrée périmée si le trade a déjà été fermé ou remplacé
+            trade = self.active_trades.get(symbol)
+            if trade is not None and now - trade['ts'] > self._max_trade_seconds:
                 self._close_trade(symbol)
-                return True
-            
-            return False
-        
-        return True
     
     def _close_trade(self, symbol: str):
         """
@@ -209,7 +347,7 @@ class TradeExecutor:
         """
         if symbol in self.active_trades:
             trade = self.active_trades.pop(symbol)
-            self.logger.warning(f"Trade pour {symbol} fermé automatiquement après durée maximale")
+            self.logger.warning("Trade pour %s fermé automatiquement après durée maximale", symbol)
             
             # TODO: Implémenter la logique de fermeture réelle du trade
     
@@ -233,10 +371,64 @@ class TradeExecutor:
             'quantity': quantity,
             'entry_price': price,
             'timestamp': datetime.now(),
+            'ts': time.monotonic(),
             'order_details': order,
             'profit_loss': 0  # À calculer lors de la fermeture du trade
         }
     
+    async def _get_ticker(self, exchange, symbol):
+        """
+        Récupération du ticker (flux WebSocket, instantané REST à défaut)
+        
+        Args:
+            exchange: Instance de l'échange
+            symbol: Symbole de trading
+        
+        Returns:
+            Ticker ccxt
+        """
+        ticker = self._ticker_cache.get(symbol)
+        if ticker is not None:
+            return ticker
+        
+        snapshot = self._ticker_snapshots.get(exchange)
+        if snapshot is None or time.monotonic() - snapshot[0] > TICKER_SNAPSHOT_TTL or symbol not in snapshot[1]:
+            tickers = await self._fetch_ticker_snapshot(exchange)
+        else:
+            tickers = snapshot[1]
+        
+        return tickers[symbol]
+    
+    async def _fetch_ticker_snapshot(self, exchange):
+        """
+        Instantané des tickers de tous les symboles d'un échange en une requête
+        Les appels concurrents partagent la même requête fetch_tickers
+        
+        Args:
+            exchange: Instance de l'échange
+        
+        Returns:
+            Dictionnaire {symbole: ticker}
+        """
+        task = self._snapshot_tasks.get(exchange)
+        
+        if task is None:
+            symbols = [symbol for symbol, ex in self.exchanges.items() if ex is exchange]
+            
+            async def fetch():
+                try:
+                    tickers = await exchange.fetch_tickers(symbols)
+                    self._ticker_snapshots[exchange] = (time.monotonic(), tickers)
+                    return tickers
+                finally:
+                    self._snapshot_tasks.pop(exchange, None)
+            
+            task = asyncio.ensure_future(fetch())
+            self._snapshot_tasks[exchange] = task
+        
+        # Protège la requête partagée de l'annulation d'un appelant
+        return await asyncio.shield(task)
+    
     async def _get_available_balance(self, exchange, symbol):
         """
         Récupération du solde disponible
@@ -249,12 +441,18 @@ class TradeExecutor:
             Solde disponible
         """
         try:
-            # Récupération du solde
-            balance = await exchange.fetch_balance()
-            quote_currency = symbol.split('/')[1]
+            quote_currency = self._quote[symbol]
+            
+            # Récupération du solde (flux WebSocket, REST à défaut ou si la
+            # devise de cotation n'y figure pas)
+            balance = self._balance_cache.get(exchange)
+            free = balance.get('free') if balance is not None else None
+            if not free or quote_currency not in free:
+                balance = await exchange.fetch_balance()
+                free = balance['free']
             
-            return balance['free'].get(quote_currency, 0)
+            return free.get(quote_currency, 0)
         
         except Exception as e:
-            self.logger.error(f"Erreur de récupération du solde pour {symbol}: {e}")
+            self.logger.error("Erreur de récupération du solde pour %s: %s", symbol, e)
             return 0
\ No newline at end of file
@@ -1,6 +1,9 @@
 # trade_strategy.py
 
 import os
+import copy
+import math
+import asyncio
 import logging
 import numpy as np
 import torch
@@ -9,6 +12,14 @@ import torch.optim as optim
 from typing import Dict, Any, List
 
 class TradingSignalGenerator:
+    # Taille d'entrée du modèle de prédiction et de l'embedding de symbole
+    MODEL_INPUT_SIZE = 50
+    SYMBOL_EMBED_DIM = 4
+    
+    # Features de chaque timeframe dans l'entrée du modèle, dans l'ordre des positions
+    MODEL_FEATURES = ('rsi', 'sma_20', 'ema_50', 'bb_width', 'returns')
+    FEATURES_PER_TIMEFRAME = len(MODEL_FEATURES)
+    
     def __init__(self, config, market_data_manager, risk_manager):
         """
         Générateur de signaux de trading avec approche hybride
@@ -23,26 +34,139 @@ class TradingSignalGenerator:
         self.risk_manager = risk_manager
         self.logger = logging.getLogger(__name__)
         
-        # Modèles de prédiction par symbole
-        self.prediction_models = {}
+        # Inférence CPU mono-thread : le MLP est trop petit pour amortir
+        # le fork/join des pools de threads intra et inter-opérateurs
+        torch.set_num_threads(1)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # Ne peut être fixé qu'avant le premier travail parallèle inter-opérateurs
+            pass
+        torch.backends.mkldnn.enabled = True
+        
+        # Modèle de prédiction partagé entre les symboles (identifiés par un embedding)
+        self.symbol_index = {symbol: index for index, symbol in enumerate(config.SYMBOLS)}
+        self.prediction_model = None
+        
+        # Vrai seulement si des poids entraînés ont été chargés : un modèle
+        # initialisé aléatoirement ne doit jamais produire de signal exécutable
+        self.model_trained = False
+        
+        # Version TorchScript figée du modèle, utilisée pour l'inférence
+        self.inference_model = None
+        
+        # Position fixe des features de chaque timeframe dans l'entrée du modèle
+        self._timeframe_slots = {
+            timeframe: i * self.FEATURES_PER_TIMEFRAME
+            for i, timeframe in enumerate(config.TIMEFRAMES)
+            if (i + 1) * self.FEATURES_PER_TIMEFRAME <= self.MODEL_INPUT_SIZE
+        }
+        
+        # Tampon d'entrée préalloué, une ligne par symbole
+        self._input_buf = np.zeros((len(config.SYMBOLS), self.MODEL_INPUT_SIZE), dtype=np.float32)
         
         # Initialisation des modèles
         self._initialize_models()
     
     def _initialize_models(self):
         """
-        Initialisation des modèles de prédiction pour chaque symbole
+        Initialisation du modèle de prédiction partagé par tous les symboles
         """
-        for symbol in self.config.SYMBOLS:
-            try:
-                # Créer un modèle de prédiction neuronal
-                model = NeuralTradingModel(input_size=50)  # Taille d'entrée adaptative
-                self.prediction_models[symbol] = model
-                
-                self.logger.info(f"Modèle initialisé pour {symbol}")
+        try:
+            # Créer un modèle de prédiction neuronal
+            model = NeuralTradingModel(
+                input_size=self.MODEL_INPUT_SIZE,
+                num_symbols=len(self.symbol_index),
+                embed_dim=self.SYMBOL_EMBED_DIM
+            )
+            
+            # Mode inférence : BatchNorm sur statistiques courantes, Dropout désactivé
+            model.eval()
+            self.prediction_model = model
             
-            except Exception as e:
-                self.logger.error(f"Erreur d'initialisation du modèle pour {symbol}: {e}")
+            self.logger.info("Modèle initialisé pour %s", ', '.join(self.symbol_index))
+        
+        except Exception as e:
+            self.logger.error("Erreur d'initialisation du modèle: %s", e)
+        
+        self._load_model_weights()
+        self.compile_inference_model()
+    
+    def _model_path(self) -> str:
+        """Chemin des poids du modèle partagé (MODEL_SAVE_PATH avec symbol='shared')"""
+        return self.config.MODEL_SAVE_PATH.format(symbol='shared')
+    
+    def _load_model_weights(self):
+        """
+        Chargement des poids entraînés du modèle partagé
+        Sans poids chargés, aucun signal exécutable n'est généré
+        """
+        if self.prediction_model is None:
+            return
+        
+        model_path = self._model_path()
+        if not os.path.exists(model_path):
+            self.logger.warning("Pas de poids entraînés (%s) : signaux désactivés", model_path)
+            return
+        
+        try:
+            state_dict = torch.load(model_path, map_location='cpu', weights_only=True)
+            self.prediction_model.load_state_dict(state_dict)
+            self.prediction_model.eval()
+            self.model_trained = True
+            self.logger.info("Poids du modèle chargés depuis %s", model_path)
+        except Exception as e:
+            self.logger.error("Erreur de chargement des poids du modèle (%s): %s", model_path, e)
+    
+    def save_model_weights(self):
+        """
+        Sauvegarde des poids du modèle partagé après entraînement
+        Le modèle est alors considéré comme entraîné et recompilé pour l'inférence
+        """
+        if self.prediction_model is None:
+            return
+        
+        try:
+            self.prediction_model.eval()
+            torch.save(self.prediction_model.state_dict(), self._model_path())
+            self.model_trained = True
+            self.compile_inference_model()
+        except Exception as e:
+            self.logger.error("Erreur de sauvegarde des poids du modèle: %s", e)
+    
+    def compile_inference_model(self):
+        """
+        Compilation du modèle de prédiction pour l'inférence
+        
+        Les BatchNorm sont repliées dans les Linear qui les précèdent, puis le
+        modèle est tracé avec TorchScript et figé, sans dispatch Python couche
+        par couche. Les poids restent en float32 : la quantification dynamique
+        int8 choisit une échelle d'activation par lot, et sur des entrées non
+        normalisées (prix bruts à côté du RSI) les logits d'un symbole
+        dépendraient des autres symboles du lot. À rappeler après chaque
+        entraînement, la version compilée est une copie du modèle.
+        """
+        self.inference_model = self.prediction_model
+        
+        if self.prediction_model is None:
+            return
+        
+        try:
+            self.prediction_model.eval()
+            model = copy.deepcopy(self.prediction_model)
+            
+            # Repli des BatchNorm dans les Linear, suppression des Dropout
+            model.fuse_for_inference()
+            
+            example_inputs = (
+                torch.zeros(1, self.MODEL_INPUT_SIZE),
+                torch.zeros(1, dtype=torch.long)
+            )
+            traced = torch.jit.trace(model, example_inputs)
+            self.inference_model = torch.jit.freeze(traced)
+        
+        except Exception as e:
+            self.logger.warning("Compilation TorchScript impossible, inférence en mode eager: %s", e)
     
     async def generate_trading_signal(self, symbol: str) -> Dict[str, Any]:
         """
@@ -54,94 +178,193 @@ class TradingSignalGenerator:
         Returns:
             Dictionnaire avec signal de trading et métriques
         """
+        signals = await self.generate_signals_batch([symbol])
+        return signals[symbol]
+    
+    async def generate_signals_batch(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Génération des signaux de trading de plusieurs symboles
+        Les features sont récupérées en parallèle et le modèle partagé ne fait
+        qu'une passe avant sur le lot de tous les symboles
+        
+        Args:
+            symbols: Symboles de trading
+        
+        Returns:
+            Dictionnaire {symbole: signal de trading}
+        """
+        signals = {}
+        
+        # Modèle non entraîné : signaux par défaut, non exécutables
+        if not self.model_trained:
+            return {symbol: self._default_signal() for symbol in symbols}
+        
         try:
             # Récupération des données de marché multi-timeframe
-            market_features = await self.market_data_manager.get_multi_timeframe_features(symbol)
+            features_list = await asyncio.gather(*(
+                self.market_data_manager.get_multi_timeframe_features(symbol) for symbol in symbols
+            ))
             
-            # Détection du régime de marché
-            market_regime = await self.market_data_manager.detect_market_regime(symbol)
+            # Détection du régime de marché à partir des mêmes features
+            regimes = await asyncio.gather(*(
+                self.market_data_manager.detect_market_regime(symbol, features)
+                for symbol, features in zip(symbols, features_list)
+            ))
             
-            # Préparation des features pour le modèle de prédiction
-            model_input = self._prepare_model_input(market_features)
+            # Symboles connus du modèle de prédiction et dont les features sont complètes
+            # (les autres reçoivent le signal par défaut, non exécutable)
+            rows = []
+            if self.inference_model is None:
+                self.logger.warning("Pas de modèle de prédiction")
+            else:
+                for row, symbol in enumerate(symbols):
+                    if symbol not in self.symbol_index:
+                        self.logger.warning("Pas de modèle de prédiction pour %s", symbol)
+                    elif not self._has_complete_features(features_list[row]):
+                        self.logger.warning("Features incomplètes pour %s, signal par défaut", symbol)
+                    else:
+                        rows.append(row)
             
-            # Récupération du modèle de prédiction
-            prediction_model = self.prediction_models.get(symbol)
-            if not prediction_model:
-                self.logger.warning(f"Pas de modèle de prédiction pour {symbol}")
-                return self._default_signal()
-            
-            # Prédiction du modèle
-            prediction = prediction_model(model_input)
-            
-            # Transformation de la prédiction en signal de trading
-            signal_value, confidence = self._process_prediction(prediction, market_regime)
-            
-            # Évaluation des risques
-            risk_assessment = self.risk_manager.assess_trade_risk(
-                trade_signal=signal_value, 
-                market_conditions={
-                    'volatility': market_regime['volatility'],
-                    'trend_strength': market_regime['trend_strength']
-                }
-            )
-            
-            return {
-                'symbol': symbol,
-                'signal': signal_value,
-                'confidence': confidence,
-                'market_regime': market_regime,
-                'risk_assessment': risk_assessment
-            }
+            # Une seule passe avant, sans suivi autograd
+            if rows:
+                # Lot d'entrée des seules lignes retenues, contiguës dans le tampon
+                # (vue passée telle quelle au modèle, sans indexation avancée)
+                batch_input = self._prepare_batch_input([features_list[row] for row in rows])
+                symbol_ids = torch.tensor([self.symbol_index[symbols[row]] for row in rows])
+                with torch.inference_mode():
+                    predictions = self.inference_model(batch_input, symbol_ids)
+                
+                for position, row in enumerate(rows):
+                    symbol = symbols[row]
+                    try:
+                        signals[symbol] = self._build_signal(
+                            symbol, predictions[position:position + 1], regimes[row]
+                        )
+                    except Exception as e:
+                        self.logger.error("Erreur de génération de signal pour %s: %s", symbol, e)
         
         except Exception as e:
-            self.logger.error(f"Erreur de génération de signal pour {symbol}: {e}")
-            return self._default_signal()
+            self.logger.error("Erreur de génération des signaux pour %s: %s", symbols, e)
+        
+        for symbol in symbols:
+            signals.setdefault(symbol, self._default_signal())
+        
+        return signals
+    
+    def _build_signal(self, symbol: str, prediction: torch.Tensor, market_regime: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Construction du signal de trading à partir de la prédiction du modèle
+        
+        Args:
+            symbol: Symbole de trading
+            prediction: Logits du modèle pour ce symbole (1, 3)
+            market_regime: Informations sur le régime de marché
+        
+        Returns:
+            Dictionnaire avec signal de trading et métriques
+        """
+        # Transformation de la prédiction en signal de trading
+        signal_value, confidence = self._process_prediction(prediction, market_regime)
+        
+        # Évaluation des risques
+        risk_assessment = self.risk_manager.assess_trade_risk(
+            trade_signal=signal_value, 
+            market_conditions={
+                'volatility': market_regime['volatility'],
+                'trend_strength': market_regime['trend_strength']
+            }
+        )
+        
+        # Prédiction neutre : rien à exécuter (ni achat, ni vente)
+        if signal_value == 0:
+            risk_assessment['executable'] = False
+        
+        return {
+            'symbol': symbol,
+            'signal': signal_value,
+            'confidence': confidence,
+            'market_regime': market_regime,
+            'risk_assessment': risk_assessment
+        }
     
-    def _prepare_model_input(self, market_features: Dict[str, Any]) -> torch.Tensor:
+    def _has_complete_features(self, market_features: Dict[str, Any]) -> bool:
+        """
+        Vérifie que chaque timeframe de l'entrée du modèle a toutes ses features, finies
+        
+        Args:
+            market_features: Features de marché multi-timeframe
+        
+        Returns:
+            Booléen indiquant si le modèle peut être évalué sur ces features
+        """
+        for timeframe in self._timeframe_slots:
+            features = market_features.get(timeframe)
+            if not features:
+                return False
+            for name in self.MODEL_FEATURES:
+                value = features.get(name)
+                if value is None or not math.isfinite(value):
+                    return False
+        return True
+    
+    def _prepare_model_input(self, market_features: Dict[str, Any], row: np.ndarray):
         """
         Prépare les features pour le modèle de prédiction
+        Disposition unique : MODEL_FEATURES à la position de chaque timeframe
+        (features complètes, vérifiées par _has_complete_features)
         
         Args:
             market_features: Features de marché multi-timeframe
+            row: Ligne du tampon d'entrée à remplir (MODEL_INPUT_SIZE,)
+        """
+        row.fill(0)
+        
+        for timeframe, base in self._timeframe_slots.items():
+            features = market_features[timeframe]
+            for offset, name in enumerate(self.MODEL_FEATURES):
+                row[base + offset] = features[name]
+    
+    def _prepare_batch_input(self, features_list: List[Dict[str, Any]]) -> torch.Tensor:
+        """
+        Prépare le lot d'entrée de plusieurs symboles
+        
+        Args:
+            features_list: Features de marché multi-timeframe par symbole
         
         Returns:
-            Tenseur d'entrée pour le modèle
+            Tenseur (nombre de symboles, MODEL_INPUT_SIZE) partageant la mémoire du tampon d'entrée
         """
-        # Extraction et normalisation des features
-        features_list = []
+        if len(features_list) > self._input_buf.shape[0]:
+            self._input_buf = np.zeros((len(features_list), self.MODEL_INPUT_SIZE), dtype=np.float32)
         
-        for timeframe, features in market_features.items():
-            # Sélection et normalisation des features clés
-            timeframe_features = [
-                features.get('rsi', 50),
-                features.get('sma_20', 0),
-                features.get('ema_50', 0),
-                features.get('bb_width', 0),
-                features.get('returns', 0)
-            ]
-            features_list.extend(timeframe_features)
+        buf = self._input_buf[:len(features_list)]
         
-        # Conversion en tenseur PyTorch
-        return torch.FloatTensor(features_list).unsqueeze(0)
+        for row, market_features in enumerate(features_list):
+            self._prepare_model_input(market_features, buf[row])
+        
+        # Sans copie : le tenseur est une vue sur le tampon
+        return torch.from_numpy(buf)
     
     def _process_prediction(self, prediction: torch.Tensor, market_regime: Dict[str, Any]) -> tuple:
         """
         Traitement de la prédiction du modèle
         
         Args:
-            prediction: Sortie du modèle de prédiction
+            prediction: Logits du modèle de prédiction
             market_regime: Informations sur le régime de marché
         
         Returns:
             Tuple (valeur du signal, confidence)
         """
-        # Transformation de la prédiction
-        _, predicted_class = torch.max(prediction, 1)
-        confidence = torch.max(prediction).item()
+        # Classe prédite directement sur les logits (softmax est monotone),
+        # confidence = probabilité softmax de cette classe
+        logits = prediction[0]
+        predicted_class = int(logits.argmax())
+        confidence = float(torch.softmax(logits, 0)[predicted_class])
         
         # Mapping des classes à des signaux
         signal_mapping = {0: -1, 1: 0, 2: 1}
-        signal_value = signal_mapping.get(predicted_class.item(), 0)
+        signal_value = signal_mapping.get(predicted_class, 0)
         
         # Ajustement du signal selon le régime de marché
         regime_adjustments = {
@@ -178,20 +401,48 @@ class TradingSignalGenerator:
             }
         }
 
+@torch.no_grad()
+def fuse_linear_bn(linear: nn.Linear, bn: nn.BatchNorm1d) -> nn.Linear:
+    """
+    Replie une BatchNorm1d (mode eval) dans la Linear qui la précède
+    
+    W' = (gamma / sqrt(var + eps)) * W
+    b' = gamma * (b - mean) / sqrt(var + eps) + beta
+    
+    Args:
+        linear: Couche linéaire, modifiée sur place
+        bn: BatchNorm suivant la couche linéaire
+    
+    Returns:
+        La couche linéaire repliée
+    """
+    scale = bn.weight / torch.sqrt(bn.running_var + bn.eps)
+    bias = linear.bias if linear.bias is not None else torch.zeros_like(bn.running_mean)
+    
+    linear.weight.mul_(scale.unsqueeze(1))
+    linear.bias = nn.Parameter((bias - bn.running_mean) * scale + bn.bias)
+    
+    return linear
+
 class NeuralTradingModel(nn.Module):
-    def __init__(self, input_size: int, hidden_sizes: List[int] = [64, 32]):
+    def __init__(self, input_size: int, hidden_sizes: List[int] = [64, 32], num_symbols: int = 0, embed_dim: int = 0):
         """
         Modèle de réseau de neurones pour prédiction de trading
         
         Args:
             input_size: Taille des features d'entrée
             hidden_sizes: Tailles des couches cachées
+            num_symbols: Nombre de symboles partageant le modèle (0 : pas d'embedding)
+            embed_dim: Taille de l'embedding de symbole concaténé aux features
         """
         super().__init__()
         
+        # Embedding optionnel du symbole
+        self.symbol_embedding = nn.Embedding(num_symbols, embed_dim) if num_symbols else None
+        
         # Couches du réseau
         layers = []
-        prev_size = input_size
+        prev_size = input_size + (embed_dim if num_symbols else 0)
         
         for size in hidden_sizes:
             layers.append(nn.Linear(prev_size, size))
@@ -200,25 +451,44 @@ class NeuralTradingModel(nn.Module):
             layers.append(nn.Dropout(0.2))
             prev_size = size
         
-        # Couche de sortie (3 classes : baisse, neutre, hausse)
+        # Couche de sortie (logits des 3 classes : baisse, neutre, hausse)
         layers.append(nn.Linear(prev_size, 3))
-        layers.append(nn.Softmax(dim=1))
         
         self.model = nn.Sequential(*layers)
     
-    def forward(self, x: torch.Tensor) -> torch.Tensor:
+    def forward(self, x: torch.Tensor, symbol_ids: torch.Tensor = None) -> torch.Tensor:
         """
         Passage avant du modèle
         
         Args:
             x: Tenseur d'entrée
+            symbol_ids: Indices des symboles de chaque ligne (si embedding)
         
         Returns:
-            Prédictions de trading
+            Logits des prédictions de trading
         """
+        if self.symbol_embedding is not None:
+            x = torch.cat([x, self.symbol_embedding(symbol_ids)], dim=1)
         return self.model(x)
     
-    def train_model(self, X_train, y_train, epochs=100, learning_rate=0.001):
+    def fuse_for_inference(self):
+        """
+        Prépare le modèle pour l'inférence seule
+        Chaque BatchNorm1d est repliée dans la Linear précédente puis remplacée
+        par nn.Identity, de même que les Dropout : il ne reste que Linear et ReLU.
+        Irréversible, à appliquer sur une copie du modèle entraîné.
+        """
+        self.eval()
+        layers = self.model
+        
+        for i, layer in enumerate(layers):
+            if isinstance(layer, nn.BatchNorm1d) and i > 0 and isinstance(layers[i - 1], nn.Linear):
+                fuse_linear_bn(layers[i - 1], layer)
+                layers[i] = nn.Identity()
+            elif isinstance(layer, nn.Dropout):
+                layers[i] = nn.Identity()
+    
+    def train_model(self, X_train, y_train, epochs=100, learning_rate=0.001, symbol_ids=None):
         """
         Entraînement du modèle
         
@@ -227,6 +497,7 @@ class NeuralTradingModel(nn.Module):
             y_train: Labels d'entraînement
             epochs: Nombre d'époques
             learning_rate: Taux d'apprentissage
+            symbol_ids: Indices des symboles de chaque exemple (si embedding)
         """
         criterion = nn.CrossEntropyLoss()
         optimizer = optim.Adam(self.parameters(), lr=learning_rate)
@@ -237,7 +508,7 @@ class NeuralTradingModel(nn.Module):
             optimizer.zero_grad()
             
             # Passage avant et calcul de la perte
-            outputs = self(X_train)
+            outputs = self(X_train, symbol_ids)
             loss = criterion(outputs, y_train)
             
             # Rétropropagation